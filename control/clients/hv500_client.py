@@ -1,10 +1,11 @@
-from functools import partial
-from PyQt5 import QtWidgets
-from twisted.internet.defer import inlineCallbacks
-from twisted.internet.task import LoopingCall
+from PyQt5 import QtCore, QtWidgets
+from twisted.internet.defer import DeferredList, ensureDeferred
 
 from thorium.control.clients.qtui.QCustomSpinBox import QCustomSpinBox
 
+POLL_PERIOD = 5  # seconds between voltage monitor updates.
+VSET_DELAY = 0.05  # seconds to wait for more setpoint changes before sending them.
+
 
 class HV500Client(QtWidgets.QWidget):
     """Client for HV500 high voltage power supply."""
@@ -15,16 +16,14 @@ class HV500Client(QtWidgets.QWidget):
         self.setSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
         self.reactor = reactor
 
-        self.ch_gen = range(1, 17)
-        self._loop_updates = []
-        for kk in self.ch_gen:
-            loop = LoopingCall(partial(self._update_voltage, kk))
-            self._loop_updates.append(loop)
+        self.ch_gen = tuple(range(1, 17))
+        self._poll_timer = None
+        self._pending_vset = {}
+        self._vset_flush = None
 
-        self.connect()
+        ensureDeferred(self.connect())
 
-    @inlineCallbacks
-    def connect(self):
+    async def connect(self):
         """
         Connects to LabRAD and initializes the GUI.
 
@@ -33,17 +32,17 @@ class HV500Client(QtWidgets.QWidget):
         """
         from labrad.wrappers import connectAsync
 
-        self.cxn = yield connectAsync(name="HV500 Client")
-        self.server = yield self.cxn.hv500_server
+        self.cxn = await connectAsync(name="HV500 Client")
+        self.server = self.cxn.hv500_server
         self._vmax = 300
         self._vmin = -300
         self.initializeGUI()
-        yield self._update_widgets()
+        await self._update_widgets()
         self._connect_widgets()
 
     def _get_vmon_text(self, channel, voltage):
         """Returns label text for a voltage monitor label."""
-        return f"V{channel}: {voltage} V"
+        return self._vmon_fmts[channel] % voltage
 
     def _get_qbox_channel(self, channel):
         """Returns a QGroupBox instance that contains controls for a output channel."""
@@ -52,13 +51,13 @@ class HV500Client(QtWidgets.QWidget):
         qbox.setLayout(sub_layout)
 
         vmon = QtWidgets.QLabel(self._get_vmon_text(channel, 0))
-        self._vmon_labels.append(vmon)
+        self._vmon_labels[channel - 1] = vmon
         sub_layout.addWidget(vmon, 0, 0, 1, 2)
 
         vset = QCustomSpinBox("Setpoint (V): ", (-self._vmax, self._vmax))
         vset.spinLevel.setDecimals(1)
         vset.setStepSize(1)
-        self._vset_spinboxes.append(vset)
+        self._vset_spinboxes[channel - 1] = vset
         sub_layout.addWidget(vset, 2, 0, 1, 2)
 
         return qbox
@@ -71,10 +70,12 @@ class HV500Client(QtWidgets.QWidget):
         qbox.setLayout(sub_layout)
         layout.addWidget(qbox, 0, 0)
 
-        self._vmon_labels = []
-        self._vset_spinboxes = []
+        self._vmon_labels = [None] * len(self.ch_gen)
+        self._vset_spinboxes = [None] * len(self.ch_gen)
         self._vset_update_buttons = []
         self._status_labels = []
+        self._last_vmons = [None] * len(self.ch_gen)
+        self._vmon_fmts = [None] + [f"V{kk}: %s V" for kk in self.ch_gen]
 
         for kk in self.ch_gen:
             qbox_channel = self._get_qbox_channel(kk)
@@ -82,41 +83,76 @@ class HV500Client(QtWidgets.QWidget):
                 sub_layout.addWidget(qbox_channel, 0, kk - 1)
             else:
                 sub_layout.addWidget(qbox_channel, 1, kk - 1 - 8)
-            self._begin_mon_update(kk)
+        self._begin_mon_update()
 
         self.setLayout(layout)
 
     def _connect_widgets(self):
         """Connects widget events with the corresponding functions."""
+        # Maps each spinbox to its channel in Qt, instead of wrapping the slot per channel.
+        self._vset_mapper = QtCore.QSignalMapper(self)
         for kk in self.ch_gen:
-            self._vset_spinboxes[kk - 1].spinLevel.valueChanged.connect(
-                partial(self._vset_changed, kk)
-            )
-
-    def _begin_mon_update(self, channel):
-        """Sets the update period of the voltage monitor of a channel to 5 seconds."""
-        self._loop_updates[channel - 1].start(5)
-
-    @inlineCallbacks
-    def _update_voltage(self, channel, recall=False):
-        """Updates the voltage of a channel from the server."""
-        vmon = yield self.server.get_voltage(channel)
-        self._vmon_labels[channel - 1].setText(self._get_vmon_text(channel, vmon))
-        if recall: return vmon
-
-    @inlineCallbacks
-    def _update_widgets(self):
+            spin_level = self._vset_spinboxes[kk - 1].spinLevel
+            self._vset_mapper.setMapping(spin_level, kk)
+            spin_level.valueChanged.connect(self._vset_mapper.map)
+        self._vset_mapper.mapped[int].connect(self._vset_channel_changed)
+
+    def _vset_channel_changed(self, channel):
+        """Reads the setpoint of a channel whose spinbox was changed."""
+        self._vset_changed(channel, self._vset_spinboxes[channel - 1].spinLevel.value())
+
+    def _begin_mon_update(self):
+        """Starts updating the voltage monitors every POLL_PERIOD seconds."""
+        self._poll()
+
+    def _poll(self):
+        """Updates the voltage monitors, and schedules the next update when done."""
+        d = ensureDeferred(self._update_all())
+        d.addBoth(self._schedule_poll)
+
+    def _schedule_poll(self, result):
+        """Schedules the next voltage monitor update."""
+        self._poll_timer = self.reactor.callLater(POLL_PERIOD, self._poll)
+        return result
+
+    async def _update_all(self, recall=False):
+        """Updates the voltages of all channels from the server."""
+        vmons = await self.server.get_all_voltages()
+        for kk, vmon in zip(self.ch_gen, vmons):
+            # Skips unchanged labels to avoid needless Qt relayouts.
+            if vmon != self._last_vmons[kk - 1]:
+                self._vmon_labels[kk - 1].setText(self._get_vmon_text(kk, vmon))
+                self._last_vmons[kk - 1] = vmon
+        if recall: return vmons
+
+    async def _update_widgets(self):
         """Updates all voltages from the server."""
-        for kk in self.ch_gen:
-            v_init = yield self._update_voltage(kk, recall=True)
+        v_inits = await self._update_all(recall=True)
+        for kk, v_init in zip(self.ch_gen, v_inits):
             self._vset_spinboxes[kk - 1].setValues(round(v_init))
 
-    @inlineCallbacks
     def _vset_changed(self, channel, value):
-        """Changes the server voltage setpoint when the spinbox is changed."""
-        yield self.server.set_voltage(channel, value)
+        """Changes the server voltage setpoint when the spinbox is changed.
+
+        Changes are coalesced for VSET_DELAY seconds, so only the latest setpoint
+        of each channel is sent to the server.
+        """
+        self._pending_vset[channel] = value
+        if self._vset_flush is not None and self._vset_flush.active():
+            self._vset_flush.reset(VSET_DELAY)
+        else:
+            self._vset_flush = self.reactor.callLater(VSET_DELAY, self._flush_vset)
+
+    def _flush_vset(self):
+        """Sends all pending voltage setpoints to the server concurrently."""
+        pending, self._pending_vset = self._pending_vset, {}
+        return DeferredList(
+            [self.server.set_voltage(ch, value) for ch, value in pending.items()]
+        )
 
     def closeEvent(self, x):
+        if self._poll_timer and self._poll_timer.active():
+            self._poll_timer.cancel()
         self.reactor.stop()
 
 
@@ -1,6 +1,8 @@
+import logging
+
 from labrad.server import LabradServer, setting
 from labrad.types import Error
-from twisted.internet.defer import inlineCallbacks, returnValue
+from twisted.internet.defer import ensureDeferred, inlineCallbacks, returnValue
 
 __all__ = [
     "setting",
@@ -45,6 +47,11 @@ class PortRegError(SerialConnectionError):
 
 NAME = "SerialDevice"
 
+log = logging.getLogger(__name__)
+
+# Port names found in the registry, keyed by (regKey, id(client)).
+_port_cache = {}
+
 
 class SerialDeviceServer(LabradServer):
     """Base class for serial device servers.
@@ -53,6 +60,8 @@ class SerialDeviceServer(LabradServer):
 
     Functionality comes from ser attribute, which represents a connection
     that performs reading and writing to a serial port.
+    There is only one connection per port, because a serial line cannot run concurrent
+    transactions. To reduce round-trips, batch requests with ser.packet() instead.
 
     Subclasses should assign some or all of the following attributes.
 
@@ -82,41 +91,54 @@ class SerialDeviceServer(LabradServer):
         def __init__(self, ser, port, **kwargs):
             timeout = kwargs.get("timeout")
             baudrate = kwargs.get("baudrate")
-            ser.open(port)
+            # Sends the port configuration in one request.
+            p = ser.packet()
+            p.open(port)
             if timeout is not None:
-                ser.timeout(timeout)
+                p.timeout(timeout)
             if baudrate is not None:
-                ser.baudrate(baudrate)
-            self.write = lambda s: ser.write(s)
-            self.write_line = lambda s: ser.write_line(s)
-            self.read = lambda x=0: ser.read(x)
-            self.read_line = lambda: ser.read_line()
-            self.read_bytes = lambda x=0: ser.read_bytes(x)
-            self.close = lambda: ser.close()
-            self.flushinput = lambda: ser.flushinput()
-            self.flushoutput = lambda: ser.flushoutput()
+                p.baudrate(baudrate)
+            p.send()
+            self.write = ser.write
+            self.write_line = ser.write_line
+            self.read = ser.read
+            self.read_line = ser.read_line
+            self.read_bytes = ser.read_bytes
+            self.close = ser.close
+            self.flushinput = ser.flushinput
+            self.flushoutput = ser.flushoutput
+            self.packet = ser.packet
             self.ID = ser.ID
 
-    @inlineCallbacks
     def initServer(self):
         """Default method used to initialize a serial server.
 
-        Override this method if the derived server needs to do other things at startup.
+        Runs the _init_serial_device coroutine and returns a Deferred for LabRAD.
+        """
+        return ensureDeferred(self._init_serial_device())
+
+    async def _init_serial_device(self):
+        """Coroutine that initializes a serial server.
+
+        Override this coroutine if the derived server needs to do other things at startup,
+        and await the base class implementation first.
         """
         if not self.regKey or not self.serNode:
             raise SerialDeviceError("Must define regKey & serNode attributes")
-        self.port = yield self.getPortFromReg(self.regKey)
+        self.port = await self.getPortFromReg(self.regKey)
         try:
-            serStr = yield self.findSerial(self.serNode)
+            serStr = await self.findSerial(self.serNode)
             self.initSerial(serStr, self.port, baudrate=self.baudrate)
         except SerialConnectionError as e:
             self.ser = None
             if e.code == 0:
-                print("Could not find serial server for node: %s" % self.serNode)
-                print("Please start correct serial server")
+                log.error(
+                    "Could not find serial server for node: %s. "
+                    "Please start correct serial server",
+                    self.serNode,
+                )
             elif e.code == 1:
-                print("Error opening serial connection")
-                print("Check set up and restart serial server")
+                log.error("Error opening serial connection. Check set up and restart serial server")
             else:
                 raise
 
@@ -136,12 +158,11 @@ class SerialDeviceServer(LabradServer):
         """
         if kwargs.get("timeout") is None and self.timeout:
             kwargs["timeout"] = self.timeout
-        print("\nAttempting to connect at:")
-        print("\n\tserver:\t%s" % serStr)
-        print("\n\tport:\t%s" % port)
-        print(
-            "\n\ttimeout:\t%s\n\n"
-            % (str(self.timeout) if kwargs.get("timeout") is not None else "No timeout")
+        log.debug(
+            "Attempting to connect at server: %s, port: %s, timeout: %s",
+            serStr,
+            port,
+            kwargs.get("timeout", "No timeout"),
         )
         cli = self.client
         try:
@@ -149,13 +170,12 @@ class SerialDeviceServer(LabradServer):
             ser = cli.servers[serStr]
             # instantiate SerialConnection convenience class
             self.ser = self.SerialConnection(ser=ser, port=port, **kwargs)
-            print("Serial connection opened.")
+            log.debug("Serial connection opened.")
         except Error:
             self.ser = None
             raise SerialConnectionError(1)
 
-    @inlineCallbacks
-    def getPortFromReg(self, regKey=None):
+    async def getPortFromReg(self, regKey=None):
         """Finds port string in registry given key.
 
         There must be a 'Ports' directory at the root of the registry folder
@@ -163,6 +183,8 @@ class SerialDeviceServer(LabradServer):
         If you do not input a parameter, it will look for the first four
         letters of your name attribute in the registry port keys.
 
+        The port name is cached, so the registry is only read once per key and client.
+
         Args:
             regKey: String used to find key match.
 
@@ -174,25 +196,27 @@ class SerialDeviceServer(LabradServer):
                 correct directory structure (['','Ports']).
             PortRegError: Error code 1. Did not find match.
         """
+        if not regKey:
+            if self.name:
+                regKey = self.name[:4].lower()
+            else:
+                raise SerialDeviceError("name attribute is None")
+        cacheKey = (regKey, id(self.client))
+        if cacheKey in _port_cache:
+            return _port_cache[cacheKey]
         reg = self.client.registry
         try:
-            tmp = yield reg.cd()
-            yield reg.cd(["", "Ports"])
-            y = yield reg.dir()
-            print(y)
-            if not regKey:
-                if self.name:
-                    regKey = self.name[:4].lower()
-                else:
-                    raise SerialDeviceError("name attribute is None")
-            portStrKey = list(filter(lambda x: regKey in x, y[1]))
-            if portStrKey:
-                portStrKey = portStrKey[0]
-            else:
+            tmp = await reg.cd()
+            await reg.cd(["", "Ports"])
+            y = await reg.dir()
+            log.debug("Registry ports: %s", y)
+            portStrKey = next((x for x in y[1] if regKey in x), None)
+            if portStrKey is None:
                 raise PortRegError(1)
-            portStrVal = yield reg.get(portStrKey)
+            portStrVal = await reg.get(portStrKey)
             reg.cd(tmp)
-            returnValue(portStrVal)
+            _port_cache[cacheKey] = portStrVal
+            return portStrVal
         except Error as e:
             reg.cd(tmp)
             if e.code == 17:
@@ -200,8 +224,7 @@ class SerialDeviceServer(LabradServer):
             else:
                 raise
 
-    @inlineCallbacks
-    def selectPortFromReg(self):
+    async def selectPortFromReg(self):
         """Selects port string from list of keys in registry.
 
         Returns:
@@ -213,17 +236,12 @@ class SerialDeviceServer(LabradServer):
         """
         reg = self.client.registry
         try:
-            yield reg.cd(["", "Ports"])
-            portDir = yield reg.dir()
+            await reg.cd(["", "Ports"])
+            portDir = await reg.dir()
             portKeys = portDir[1]
             if not portKeys:
                 raise PortRegError(2)
-            keyDict = {}
-            map(
-                lambda x, y: keyDict.update({x: y}),
-                [str(i) for i in range(len(portKeys))],
-                portKeys,
-            )
+            keyDict = {str(i): key for i, key in enumerate(portKeys)}
             for key in keyDict:
                 print(key, ":", keyDict[key])
             selection = None
@@ -231,16 +249,14 @@ class SerialDeviceServer(LabradServer):
                 print("Select the number corresponding to the device you are using:")
                 selection = input("")
                 if selection in keyDict:
-                    portStr = yield reg.get(keyDict[selection])
-                    returnValue(portStr)
+                    return await reg.get(keyDict[selection])
         except Error as e:
             if e.code == 13:
                 raise PortRegError(0)
             else:
                 raise
 
-    @inlineCallbacks
-    def findSerial(self, serNode=None):
+    async def findSerial(self, serNode=None):
         """Finds appropriate serial server.
 
         Look for servers with 'serial' and serNode in the name, take first result
@@ -257,9 +273,9 @@ class SerialDeviceServer(LabradServer):
         if not serNode:
             serNode = self.serNode
         cli = self.client
-        servers = yield cli.manager.servers()
+        servers = await cli.manager.servers()
         try:
-            returnValue([i[1] for i in servers if self._matchSerial(serNode, i[1])][0])
+            return [i[1] for i in servers if self._matchSerial(serNode, i[1])][0]
         except IndexError:
             raise SerialConnectionError(0)
 
@@ -291,12 +307,12 @@ class SerialDeviceServer(LabradServer):
         )
         if should_init:
             self.initSerial(name, self.port)
-            print("Serial server connected after we connected")
+            log.info("Serial server connected after we connected")
 
     def serverDisconnected(self, ID, name):
         """Closes connection (if we are connected)."""
         if self.ser and self.ser.ID == ID:
-            print("Serial server disconnected.  Relaunch the serial server")
+            log.warning("Serial server disconnected.  Relaunch the serial server")
             self.ser = None
 
     def stopServer(self):
@@ -3,6 +3,11 @@ import socket
 from labrad.server import LabradServer, inlineCallbacks
 from twisted.internet.defer import returnValue
 
+RX_BUFFER_SIZE = 65536  # initial size of the receive buffer in bytes.
+
+# Device addresses found in the registry, keyed by (key, id(client)).
+_address_cache = {}
+
 
 class TCPServer(LabradServer):
     """Base server for controlling a device with network communication.
@@ -31,6 +36,9 @@ class TCPServer(LabradServer):
         self.socket = socket.socket()
         self.socket.connect((address, self.port))
         self.socket.settimeout(self.timeout)
+        # Reusable receive buffer, so reads do not allocate a new bytes object per recv.
+        self._rxbuf = bytearray(RX_BUFFER_SIZE)
+        self._rxview = memoryview(self._rxbuf)
 
     @inlineCallbacks
     def get_address(self, key):
@@ -38,6 +46,7 @@ class TCPServer(LabradServer):
 
         It looks up the key in LabRAD registry - Ports.
         The value of the key should be a str of the IP address.
+        The address is cached, so the registry is only read once per key and client.
 
         Args:
             key: str, key in the "Ports" directory that stores the device address.
@@ -45,6 +54,9 @@ class TCPServer(LabradServer):
         Returns:
             str, IP address.
         """
+        cache_key = (key, id(self.client))
+        if cache_key in _address_cache:
+            returnValue(_address_cache[cache_key])
         reg = self.client.registry
         # Remembers the previous directory in the registry.
         current_directory = yield reg.cd()
@@ -61,6 +73,7 @@ class TCPServer(LabradServer):
             raise Exception(f"Cannot find key '{key}' in 'Ports' directory.")
         # Goes back to the previous directory in the registry.
         reg.cd(current_directory)
+        _address_cache[cache_key] = address
         returnValue(address)
 
     def send(self, str_to_send):
@@ -83,25 +96,49 @@ class TCPServer(LabradServer):
         Returns:
             str, data read from the socket.
         """
-        str_to_return = ""
-        READ_SIZE = 4096
-        while termination not in str_to_return:
-            str_to_return += self.socket.recv(READ_SIZE).decode()
-        return str_to_return
+        termination_bytes = termination.encode()
+        pos = 0
+        search_start = 0
+        while self._rxbuf.find(termination_bytes, search_start, pos) == -1:
+            # Only searches new data, allowing for a termination split between reads.
+            search_start = max(pos - len(termination_bytes) + 1, 0)
+            if pos == len(self._rxbuf):
+                self._grow_rxbuf()
+            pos += self.socket.recv_into(self._rxview[pos:])
+        # Decodes once, so multibyte characters split between reads are not corrupted.
+        return self._rxbuf[:pos].decode()
 
     def readall(self):
         """Reads all from the socket read buffer.
 
         This function is useful to clear the read buffer when the server starts.
-        It stops after the first timeout.
+        It does not wait for new data, and returns once the read buffer is empty.
 
         Returns:
             str, data read from the socket.
         """
-        READ_SIZE = 4096  # a typical socket read size.
-        str_to_return = ""
+        pos = 0
+        self.socket.setblocking(False)
         try:
-            str_to_return += self.socket.recv(READ_SIZE).decode()
-        except (socket.timeout, TimeoutError):
-            # socket.timeout is changed to TimeoutError in Python 3.10.
-            return str_to_return
+            while True:
+                if pos == len(self._rxbuf):
+                    self._grow_rxbuf()
+                nbytes = self.socket.recv_into(self._rxview[pos:])
+                if nbytes == 0:
+                    # The connection is closed.
+                    break
+                pos += nbytes
+        except BlockingIOError:
+            # The read buffer is empty.
+            pass
+        finally:
+            # setblocking(True) would remove the timeout, so it is set again instead.
+            self.socket.settimeout(self.timeout)
+        return self._rxbuf[:pos].decode()
+
+    def _grow_rxbuf(self):
+        """Doubles the size of the receive buffer."""
+        # A bytearray cannot be resized while a memoryview of it exists.
+        self._rxview.release()
+        self._rxbuf.extend(bytes(len(self._rxbuf)))
+        self._rxview = memoryview(self._rxbuf)
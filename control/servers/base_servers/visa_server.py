@@ -1,7 +1,16 @@
+import logging
+
 import pyvisa as visa
 from labrad.server import LabradServer
 from twisted.internet.defer import inlineCallbacks, returnValue
 
+from thorium.control.servers.base_servers.serial_device_server import PortRegError
+
+log = logging.getLogger(__name__)
+
+# Port names found in the registry, keyed by (regKey, id(client)).
+_port_cache = {}
+
 
 class VisaServer(LabradServer):
     """Generic LabRAD server for VISA devices."""
@@ -13,9 +22,9 @@ class VisaServer(LabradServer):
             self.instruments = rm.list_resources()
 
             if len(self.instruments) == 0:
-                print("Device not connected!")
+                log.warning("Device not connected!")
             else:
-                print("Visa devices: ", self.instruments)
+                log.debug("Visa devices: %s", self.instruments)
                 self.address = ""
                 for _name, address in links:
                     if address in self.instruments:
@@ -23,13 +32,13 @@ class VisaServer(LabradServer):
                         break
 
                 if self.address == "":
-                    print("Device not found!")
+                    log.warning("Device not found!")
                 else:
                     self.device = rm.open_resource(self.address)
-                    print("Device connected!")
+                    log.info("Device connected!")
 
         except visa.VisaIOError:
-            print("Pyvisa is not able to find the connections")
+            log.error("Pyvisa is not able to find the connections")
 
     @inlineCallbacks
     def loadConfigInfo(self):
@@ -46,6 +55,8 @@ class VisaServer(LabradServer):
         If you do not input a parameter, it will look for the first four letters
         of your name attribute in the registry port keys.
 
+        The port name is cached, so the registry is only read once per key and client.
+
         Args:
             regKey: String used to find key match.
 
@@ -57,25 +68,27 @@ class VisaServer(LabradServer):
                 Registry does not have correct directory structure (['','Ports']).
             PortRegError: Error code 1.  Did not find match.
         """
+        if not regKey:
+            if self.name:
+                regKey = self.name[:4].lower()
+            else:
+                raise Exception("name attribute is None")
+        cacheKey = (regKey, id(self.client))
+        if cacheKey in _port_cache:
+            returnValue(_port_cache[cacheKey])
         reg = self.client.registry
         # There must be a 'Ports' directory at the root of the registry folder
         try:
             tmp = yield reg.cd()
             yield reg.cd(["", "Ports"])
             y = yield reg.dir()
-            print(y)
-            if not regKey:
-                if self.name:
-                    regKey = self.name[:4].lower()
-                else:
-                    raise Exception("name attribute is None")
-            portStrKey = [x for x in y[1] if regKey in x]
-            if portStrKey:
-                portStrKey = portStrKey[0]
-            else:
-                raise Exception("")
+            log.debug("Registry ports: %s", y)
+            portStrKey = next((x for x in y[1] if regKey in x), None)
+            if portStrKey is None:
+                raise PortRegError(1)
             portStrVal = yield reg.get(portStrKey)
             reg.cd(tmp)
+            _port_cache[cacheKey] = portStrVal
             returnValue(portStrVal)
         except Exception as e:
             reg.cd(tmp)
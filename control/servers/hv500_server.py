@@ -1,8 +1,14 @@
+import logging
+
 from labrad.support import getNodeName
-from labrad.types import Value
-from twisted.internet.defer import returnValue
+from labrad.types import Error, Value
+from twisted.internet.defer import DeferredQueue, ensureDeferred
 
-from thorium.control.servers.base_servers.serial_device_server import SerialDeviceServer, inlineCallbacks, setting
+from thorium.control.servers.base_servers.serial_device_server import (
+    SerialConnectionError,
+    SerialDeviceServer,
+    setting,
+)
 
 SERVERNAME = "hv500_server"
 TIMEOUT = 0.1
@@ -26,7 +32,10 @@ timeout = 5
 ### END NODE INFO
 """
 
+log = logging.getLogger(__name__)
+
 VLIM = 300
+NUM_CHANNELS = 16
 
 class HV500Server(SerialDeviceServer):
     """Serial server for the HV500-16 low noise voltage supply."""
@@ -45,14 +54,32 @@ class HV500Server(SerialDeviceServer):
             return "0" + _channel
 
     def voltage_to_kw(self, v):
-        d = (v+500)/1000
-        return f'{d:.6f}'
+        return "%.6f" % ((v+500)/1000)
 
-    @inlineCallbacks
-    def initServer(self):
-        yield super(HV500Server, self).initServer()
+    async def _init_serial_device(self):
+        await super(HV500Server, self)._init_serial_device()
         self.listeners = set()
         self.IDN = self.regKey[-5:]
+        # Commands only depend on the channel, so they are built once here.
+        self._query_cmds = [None] + [
+            self.IDN+" Q"+self.channel_to_str(channel)+"\r"
+            for channel in range(1, NUM_CHANNELS + 1)
+        ]
+        self._set_template = self.IDN+" CH%02d %s\r"
+        # Setpoint commands are written to the device in order by a single writer.
+        self._set_queue = DeferredQueue()
+        self._writer = ensureDeferred(self._drain_writes())
+
+    async def _drain_writes(self):
+        """Writes queued setpoint commands to the device."""
+        while True:
+            cmd = await self._set_queue.get()
+            try:
+                # The connection may have been lost since the command was queued.
+                self.checkConnection()
+                await self.ser.write(cmd)
+            except (Error, SerialConnectionError) as e:
+                log.error("Failed to write setpoint command %r: %s", cmd, e)
 
     @setting(1, returns="s")
     def get_ID(self, c):
@@ -60,9 +87,11 @@ class HV500Server(SerialDeviceServer):
         Returns device identification number e.g. 'HV264 500 16 b'.
         First string 'HV264' is the IDN necessary to address device.
         """
-        yield self.ser.write("IDN\r")
-        val = yield self.ser.read_line()
-        returnValue(val)
+        return ensureDeferred(self._get_ID())
+
+    async def _get_ID(self):
+        await self.ser.write("IDN\r")
+        return await self.ser.read_line()
 
     @setting(2, channel="i", returns='v')
     def get_voltage(self, c, channel):
@@ -75,26 +104,53 @@ class HV500Server(SerialDeviceServer):
         Returns:
             float, voltage in volts.
         """
-        ch_str = self.channel_to_str(channel)
-        yield self.ser.write(self.IDN+" Q"+ch_str+"\r")
-        val = yield self.ser.read_line()
-        returnValue(float(val[:-1]))
+        if channel < 1 or channel > NUM_CHANNELS:
+            raise ValueError("Channel out of bounds.")
+        return ensureDeferred(self._get_voltage(channel))
+
+    async def _get_voltage(self, channel):
+        await self.ser.write(self._query_cmds[channel])
+        val = await self.ser.read_line()
+        return float(val[:-1])
+
+    @setting(4, returns='*v')
+    def get_all_voltages(self, c):
+        """
+        Reads the voltages of all channels in one request.
+
+        Returns:
+            list of floats, voltages in volts of channels 1 to 16.
+        """
+        return ensureDeferred(self._get_all_voltages())
+
+    async def _get_all_voltages(self):
+        # Sends all queries in one packet, so the serial server runs them in a single request.
+        p = self.ser.packet()
+        channels = range(1, NUM_CHANNELS + 1)
+        for channel in channels:
+            p.write(self._query_cmds[channel])
+            p.read_line(key=channel)
+        resp = await p.send()
+        return [float(resp[channel][:-1]) for channel in channels]
 
     @setting(3, channel="i", voltage='v')
     def set_voltage(self, c, channel, voltage):
         """
         Sets voltage on the specified channel.
 
+        The setpoint is queued and written to the device without waiting for it.
+
         Args:
             channel: int, channel between 1 and 16.
             voltage: float, voltage in volts.
         """
+        if channel < 1 or channel > NUM_CHANNELS:
+            raise ValueError("Channel out of bounds.")
         if voltage > VLIM or voltage < -VLIM:
             raise ValueError("Voltage setpoint out of bounds.")
         else:
-            ch_str = self.channel_to_str(channel)
-            volt_str = self.voltage_to_kw(voltage)
-            yield self.ser.write(self.IDN+" CH"+ch_str+" "+volt_str+"\r")
+            self.checkConnection()
+            self._set_queue.put(self._set_template % (channel, self.voltage_to_kw(voltage)))
 
 
 if __name__ == "__main__":